@@ -7,16 +7,13 @@ Possible generated XML files are:
 * Test Case Importer XML
 * Test Run Importer XML
 """
+import functools
 import itertools
-import json
 import logging
 import re
-import ssl
 import time
-from collections import Counter
-from xml.dom import minidom
 from xml.etree import ElementTree
-from xml.parsers.expat import ExpatError
+from xml.sax.saxutils import escape
 
 import click
 
@@ -25,10 +22,13 @@ from betelgeuse import collector, config
 
 logging.captureWarnings(True)
 
-# Avoid SSL errors
-ssl._create_default_https_context = ssl._create_unverified_context
+#: Characters not allowed on a test run ID
+INVALID_CHARS = '\\/.:"<>|~!@#$?%^&\'*()+`,='
 
-INVALID_CHARS_REGEX = re.compile(r'[\\/.:"<>|~!@#$?%^&\'*()+`,=]')
+INVALID_CHARS_REGEX = re.compile('[{}]'.format(re.escape(INVALID_CHARS)))
+
+# Translation table which drops the invalid characters
+_INVALID_CHARS_TABLE = dict.fromkeys(map(ord, INVALID_CHARS))
 
 POLARION_STATUS = {
     'error': 'failed',
@@ -46,10 +46,34 @@ TESTCASE_ATTRIBUTES_TO_FIELDS = {
     'status-id': 'status',
 }
 
-JUNIT_TEST_STATUS = ['error', 'failure', 'skipped']
+JUNIT_TEST_STATUS = frozenset(('error', 'failure', 'skipped'))
+
+#: Test run importer properties which are not custom fields
+TEST_RUN_PROPERTIES = frozenset((
+    'polarion-create-defects',
+    'polarion-custom-lookup-method-field-id',
+    'polarion-dry-run',
+    'polarion-group-id',
+    'polarion-include-skipped',
+    'polarion-lookup-method',
+    'polarion-project-id',
+    'polarion-project-span-ids',
+    'polarion-testrun-id',
+    'polarion-testrun-status-id',
+    'polarion-testrun-template-id',
+    'polarion-testrun-title',
+    'polarion-testrun-type-id',
+    'polarion-user-id',
+))
+
+#: Prefixes of test run importer properties which are already namespaced
+TEST_RUN_PROPERTY_PREFIXES = ('polarion-custom-', 'polarion-response-')
 
-# Cache for shared objects
-OBJ_CACHE = {'requirements': {}}
+# Characters escaped by minidom besides the ones escaped by saxutils.escape
+_MINIDOM_ENTITIES = {'"': '&quot;'}
+
+#: Buffer size, in bytes, used when writing the generated XML files
+XML_WRITE_BUFFER_SIZE = 1 << 20
 
 
 def validate_key_value_option(ctx, param, value):
@@ -75,18 +99,71 @@ def load_custom_fields(custom_fields_opt):
 
     :param custom_fields_opt: A tuple of --custom-fields option.
     """
+    import json
+
     custom_fields = {}
     if not custom_fields_opt:
         return custom_fields
     for item in custom_fields_opt:
         if item.startswith('{'):
             custom_fields.update(json.loads(item))
-        elif '=' in item:
-            key, value = item.split('=', 1)
+            continue
+        key, sep, value = item.partition('=')
+        if sep:
             custom_fields[key.strip()] = value.strip()
     return custom_fields
 
 
+def _minidom_escape(data):
+    """Escape ``data`` the same way ``minidom`` does on text and attributes."""
+    return escape(data, _MINIDOM_ENTITIES)
+
+
+def _minidom_xml(element):
+    """Return the XML representation of ``element`` as ``minidom`` would.
+
+    The steps are stored on the imported test cases, keep them the same as when
+    they were serialized by ``minidom``. The tail of ``element`` is not
+    included.
+    """
+    if element.tag is ElementTree.Comment:
+        return '<!--{}-->'.format(element.text)
+    parts = ['<', element.tag]
+    for name, value in element.attrib.items():
+        parts.append(' {}="{}"'.format(name, _minidom_escape(value)))
+    if not element.text and not len(element):
+        parts.append('/>')
+        return ''.join(parts)
+    parts.append('>')
+    if element.text:
+        parts.append(_minidom_escape(element.text))
+    for child in element:
+        parts.append(_minidom_xml(child))
+        if child.tail:
+            parts.append(_minidom_escape(child.tail))
+    parts.append('</{}>'.format(element.tag))
+    return ''.join(parts)
+
+
+def _first_child_xml(element):
+    """Return the XML representation of the first child node of ``element``.
+
+    The first child node is either the leading text of ``element`` or its
+    first sub element, serialized without the text that follows it.
+    """
+    if element.text:
+        return _minidom_escape(element.text)
+    if len(element) == 0:
+        return ''
+    return _minidom_xml(element[0])
+
+
+def _parse_steps_xml(text):
+    """Parse the steps or expected results HTML keeping its comments."""
+    return ElementTree.fromstring(text, parser=ElementTree.XMLParser(
+        target=ElementTree.TreeBuilder(insert_comments=True)))
+
+
 def map_steps(steps, expectedresults):
     """Map each step to its expected result.
 
@@ -121,25 +198,21 @@ def map_steps(steps, expectedresults):
         list of expectedresults or a single paragraph.
     """
     try:
-        parsed_steps = minidom.parseString(steps.encode('utf-8'))
-        parsed_expectedresults = minidom.parseString(
-            expectedresults.encode('utf-8'))
-    except ExpatError:
+        parsed_steps = _parse_steps_xml(steps)
+        parsed_expectedresults = _parse_steps_xml(expectedresults)
+    except ElementTree.ParseError:
         return [(steps, expectedresults)]
-    if (parsed_steps.firstChild.tagName == 'p' and
-            parsed_expectedresults.firstChild.tagName == 'p'):
-        parsed_steps = [parsed_steps.firstChild.toxml()]
-        parsed_expectedresults = [
-            parsed_expectedresults.firstChild.toxml()]
-    elif (parsed_steps.firstChild.tagName == 'ol' and
-            parsed_expectedresults.firstChild.tagName == 'ol'):
+    if parsed_steps.tag == 'p' and parsed_expectedresults.tag == 'p':
+        parsed_steps = [_minidom_xml(parsed_steps)]
+        parsed_expectedresults = [_minidom_xml(parsed_expectedresults)]
+    elif parsed_steps.tag == 'ol' and parsed_expectedresults.tag == 'ol':
         parsed_steps = [
-            element.firstChild.toxml()
-            for element in parsed_steps.getElementsByTagName('li')
+            _first_child_xml(element)
+            for element in parsed_steps.iter('li')
         ]
         parsed_expectedresults = [
-            element.firstChild.toxml()
-            for element in parsed_expectedresults.getElementsByTagName('li')
+            _first_child_xml(element)
+            for element in parsed_expectedresults.iter('li')
         ]
     else:
         parsed_steps = [steps]
@@ -150,6 +223,25 @@ def map_steps(steps, expectedresults):
         return [(steps, expectedresults)]
 
 
+def _iter_junit_testcases(path):
+    """Yield the testcase elements of the jUnit file at ``path``.
+
+    The file is parsed incrementally and every testcase is removed from its
+    parent once consumed, so only one of them needs to be in memory at a time.
+    """
+    parents = []
+    for event, element in ElementTree.iterparse(
+            path, events=('start', 'end')):
+        if event == 'start':
+            parents.append(element)
+            continue
+        parents.pop()
+        if element.tag == 'testcase':
+            yield element
+            if parents:
+                parents[-1].remove(element)
+
+
 def parse_junit(path):
     """Parse a jUnit XML file.
 
@@ -182,19 +274,21 @@ def parse_junit(path):
     :return: A list of dicts with information about every test
         case result.
     """
-    root = ElementTree.parse(path).getroot()
     result = []
-    for testcase in root.iter('testcase'):
-        data = testcase.attrib
+    for testcase in _iter_junit_testcases(path):
+        data = dict(testcase.attrib)
         # Check if the test has passed or else...
-        status = [
-            element for element in list(testcase)
-            if element.tag in JUNIT_TEST_STATUS
-        ]
+        status = next(
+            (
+                element for element in testcase
+                if element.tag in JUNIT_TEST_STATUS
+            ),
+            None
+        )
         # ... no status means the test has passed
-        if status:
-            data['status'] = status[0].tag
-            data.update(status[0].attrib)
+        if status is not None:
+            data['status'] = status.tag
+            data.update(status.attrib)
         else:
             data['status'] = u'passed'
 
@@ -211,7 +305,11 @@ def parse_test_results(test_results):
         provided by the ``test_results`` parameter, broken down by their
         status.
     """
-    return Counter([test['status'] for test in test_results])
+    summary = {}
+    for test in test_results:
+        status = test['status']
+        summary[status] = summary.get(status, 0) + 1
+    return summary
 
 
 pass_config = click.make_pass_decorator(config.BetelgeuseConfig, ensure=True)
@@ -290,25 +388,22 @@ def requirement(
     Other requirement importer options can be set by the various options this
     command accepts. Check their help for more information.
     """
-    requirements = ElementTree.Element('requirements')
-    requirements.set('project-id', project)
+    requirements = ElementTree.Element('requirements', {'project-id': project})
     if response_property:
-        response_properties = ElementTree.Element('response-properties')
-        element = ElementTree.Element('response-property')
-        element.set('name', response_property[0])
-        element.set('value', response_property[1])
-        response_properties.append(element)
-        requirements.append(response_properties)
-    properties = ElementTree.Element('properties')
-    properties.append(create_xml_property(
-        'dry-run', 'true' if dry_run else 'false'))
-    properties.append(create_xml_property(
-        'lookup-method', lookup_method))
-    requirements.append(properties)
-
-    source_testcases = itertools.chain(*collector.collect_tests(
+        response_properties = ElementTree.SubElement(
+            requirements, 'response-properties')
+        ElementTree.SubElement(response_properties, 'response-property', {
+            'name': response_property[0],
+            'value': response_property[1],
+        })
+    properties = ElementTree.SubElement(requirements, 'properties')
+    create_xml_property(
+        'dry-run', 'true' if dry_run else 'false', properties)
+    create_xml_property('lookup-method', lookup_method, properties)
+
+    source_testcases = itertools.chain.from_iterable(collector.collect_tests(
         source_code_path, collect_ignore_path).values())
-    cache = []
+    cache = set()
     for testcase in source_testcases:
         update_testcase_fields(config, testcase)
         if ('requirement' in testcase.fields and
@@ -336,13 +431,12 @@ def requirement(
                         requirement.fields[field],
                         requirement
                     )
-            cache.append(requirement_title)
+            cache.add(requirement_title)
             requirements.append(
                 create_xml_requirement(config, requirement)
             )
 
-    et = ElementTree.ElementTree(requirements)
-    et.write(output_path, encoding='utf-8', xml_declaration=True)
+    write_xml(requirements, output_path)
 
 
 @cli.command('test-results')
@@ -361,12 +455,116 @@ def test_results(path):
     click.echo(summary)
 
 
-def create_xml_property(name, value):
-    """Create an XML property element and set its name and value attributes."""
-    element = ElementTree.Element('property')
-    element.set('name', name)
-    element.set('value', value)
-    return element
+def create_xml_property(name, value, parent=None):
+    """Create an XML property element and set its name and value attributes.
+
+    If ``parent`` is provided, the property element is created as its last
+    child.
+    """
+    attrib = {'name': name, 'value': value}
+    if parent is not None:
+        return ElementTree.SubElement(parent, 'property', attrib)
+    return ElementTree.Element('property', attrib)
+
+
+def write_xml(element, path, subelements=None, parent=None):
+    """Write ``element`` as an UTF-8 encoded XML document to ``path``.
+
+    If ``subelements`` is provided, each of its elements is serialized and
+    written right away as a child of ``parent``, after its existing children.
+    That way the subelements never need to be in memory all at once.
+
+    The part of the document before the subelements is serialized only when
+    the first subelement is available and the part after them only when all
+    of them were written. This allows ``subelements`` to keep updating the
+    tree around them, for example setting the attributes of ``parent``.
+
+    :param element: the root element of the document.
+    :param path: the output file path.
+    :param subelements: an optional iterable of elements to be streamed.
+    :param parent: the element, part of the ``element`` tree, which will
+        contain the streamed subelements. Defaults to ``element``.
+    """
+    subelement = None
+    if subelements is not None:
+        # Get the first subelement before opening path, an error while
+        # building it leaves the path untouched.
+        subelements = iter(subelements)
+        subelement = next(subelements, None)
+    # Streamed subelements are written one by one, use a larger buffer than
+    # the default one to reduce the number of write calls.
+    with open(path, 'wb', buffering=XML_WRITE_BUFFER_SIZE) as handler:
+        if subelement is None:
+            # Nothing to stream, the tree is complete and can be written as is
+            handler.write(ElementTree.tostring(
+                element, encoding='utf-8', xml_declaration=True))
+        else:
+            _write_xml_stream(
+                handler, element, subelement, subelements, parent)
+
+
+def _write_xml_stream(handler, element, subelement, subelements, parent):
+    """Write the ``write_xml`` document streaming the subelements."""
+    if parent is None:
+        parent = element
+    # Serialize the document with a placeholder as the last child of parent in
+    # order to know where the streamed subelements go.
+    placeholder = ElementTree.SubElement(parent, 'placeholder')
+    try:
+        marker = ElementTree.tostring(placeholder, encoding='utf-8')
+        handler.write(ElementTree.tostring(
+            element, encoding='utf-8', xml_declaration=True
+        ).rsplit(marker, 1)[0])
+        # Bind the names used for every streamed subelement to locals
+        write = handler.write
+        tostring = ElementTree.tostring
+        while subelement is not None:
+            write(tostring(subelement, encoding='utf-8'))
+            subelement = next(subelements, None)
+        handler.write(ElementTree.tostring(
+            element, encoding='utf-8', xml_declaration=True
+        ).rsplit(marker, 1)[1])
+    finally:
+        parent.remove(placeholder)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_testcase_field_defaults(config):
+    """Return the testcase fields which have a default value on the config.
+
+    The config does not change during a run, so the default values are looked
+    up once instead of once per testcase.
+
+    :returns: a tuple of ``(field, default)`` pairs.
+    """
+    field_defaults = []
+    for field in config.TESTCASE_FIELDS + config.TESTCASE_CUSTOM_FIELDS:
+        default = getattr(
+            config, 'DEFAULT_{}_VALUE'.format(field.upper()), None)
+        if default is not None:
+            field_defaults.append((field, default))
+    return tuple(field_defaults)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_testcase_field_transforms(config):
+    """Return the testcase fields transformations available on the config.
+
+    The config does not change during a run, so the transformations are
+    looked up once instead of once per testcase field.
+
+    :returns: a dict mapping the lower case field names to the
+        ``TRANSFORM_<FIELD>_VALUE`` callables.
+    """
+    field_transforms = {}
+    for name in dir(config):
+        if not (name.startswith('TRANSFORM_') and name.endswith('_VALUE')):
+            continue
+        transform_func = getattr(config, name)
+        if callable(transform_func):
+            field = name[len('TRANSFORM_'):-len('_VALUE')].lower()
+            field_transforms[field] = transform_func
+    return field_transforms
 
 
 def get_field_values(config, testcase):
@@ -382,11 +580,8 @@ def get_field_values(config, testcase):
         and the ones with default value on the config module.
     """
     fields = testcase.fields.copy()
-    for field in config.TESTCASE_FIELDS + config.TESTCASE_CUSTOM_FIELDS:
-        value = fields.get(field)
-        if value is None:
-            default = getattr(
-                config, 'DEFAULT_{}_VALUE'.format(field.upper()), None)
+    for field, default in _get_testcase_field_defaults(config):
+        if fields.get(field) is None:
             if callable(default):
                 default = default(testcase)
             if default is not None:
@@ -394,6 +589,27 @@ def get_field_values(config, testcase):
     return fields
 
 
+@functools.lru_cache(maxsize=None)
+def _get_requirement_field_defaults(config):
+    """Return the requirement fields which have a default value on the config.
+
+    The config does not change during a run, so the default values are looked
+    up once instead of once per requirement.
+
+    :returns: a tuple of ``(field, default)`` pairs.
+    """
+    field_defaults = []
+    for field in config.REQUIREMENT_FIELDS + config.REQUIREMENT_CUSTOM_FIELDS:
+        default = getattr(
+            config,
+            'DEFAULT_REQUIREMENT_{}_VALUE'.format(field.upper()),
+            None,
+        )
+        if default is not None:
+            field_defaults.append((field, default))
+    return tuple(field_defaults)
+
+
 def get_requirement_field_values(config, requirement):
     """Return a dict of requirement fields and their values.
 
@@ -406,14 +622,8 @@ def get_requirement_field_values(config, requirement):
     :returns: a dict with all fields populated, include requirement title.
     """
     fields = requirement.fields.copy()
-    for field in config.REQUIREMENT_FIELDS + config.REQUIREMENT_CUSTOM_FIELDS:
-        value = fields.get(field)
-        if value is None:
-            default = getattr(
-                config,
-                'DEFAULT_REQUIREMENT_{}_VALUE'.format(field.upper()),
-                None,
-            )
+    for field, default in _get_requirement_field_defaults(config):
+        if fields.get(field) is None:
             if callable(default):
                 default = default(requirement)
             if default is not None:
@@ -423,18 +633,15 @@ def get_requirement_field_values(config, requirement):
 
 def update_testcase_fields(config, testcase):
     """Apply testcase fields default values and transformations."""
-    if testcase.docstring and not isinstance(testcase.docstring, str):
-        testcase.docstring = testcase.docstring.decode('utf8')
-
-    # Check if any field needs a default value
-    testcase.fields = {k.lower(): v for k, v in testcase.fields.items()}
-    testcase.fields.update(get_field_values(config, testcase))
+    # Check if any field needs a default value. There is no need to lower
+    # case the field names, parse_docstring already does that.
+    testcase.fields = get_field_values(config, testcase)
 
     # Apply the available transformations to the testcase fields
+    field_transforms = _get_testcase_field_transforms(config)
     for field in testcase.fields.keys():
-        transform_func = getattr(
-            config, 'TRANSFORM_{}_VALUE'.format(field.upper()), None)
-        if callable(transform_func):
+        transform_func = field_transforms.get(field)
+        if transform_func is not None:
             testcase.fields[field] = transform_func(
                 testcase.fields[field], testcase)
 
@@ -445,10 +652,11 @@ def create_xml_testcase(config, testcase, automation_script_format):
     The element will be in the format to be used by the XML test case importer.
     """
     update_testcase_fields(config, testcase)
+    fields = testcase.fields
 
     # If automation_script is not defined on the docstring generate one
-    if 'automation_script' not in testcase.fields:
-        testcase.fields['automation_script'] = automation_script_format.format(
+    if 'automation_script' not in fields:
+        fields['automation_script'] = automation_script_format.format(
             path=testcase.module_def.path,
             line_number=testcase.function_def.lineno,
         )
@@ -459,76 +667,63 @@ def create_xml_testcase(config, testcase, automation_script_format):
 
     # Set the testcase element attributes
     for attribute, field in TESTCASE_ATTRIBUTES_TO_FIELDS.items():
-        value = testcase.fields.get(field)
+        value = fields.get(field)
         if value is not None:
             element.set(attribute, value)
 
     # Title and description require their own node
     for field in ('title', 'description'):
-        value = testcase.fields.get(field)
+        value = fields.get(field)
         if value is not None:
-            field_element = ElementTree.Element(field)
-            field_element.text = value
-            element.append(field_element)
+            ElementTree.SubElement(element, field).text = value
 
     # Should the testcase be linked to a Requiment?
-    if 'requirement' in testcase.fields:
-        linked_work_items = ElementTree.Element('linked-work-items')
-        linked_work_item = ElementTree.Element('linked-work-item')
-        linked_work_item.set('lookup-method', 'name')
-        linked_work_item.set('role-id', 'verifies')
-        linked_work_item.set('workitem-id', testcase.fields['requirement'])
-        linked_work_items.append(linked_work_item)
-        element.append(linked_work_items)
+    if 'requirement' in fields:
+        linked_work_items = ElementTree.SubElement(
+            element, 'linked-work-items')
+        ElementTree.SubElement(linked_work_items, 'linked-work-item', {
+            'lookup-method': 'name',
+            'role-id': 'verifies',
+            'workitem-id': fields['requirement'],
+        })
 
     # Steps and expected results will be mapped only if both are defined
-    steps = testcase.fields.get('steps')
-    expectedresults = testcase.fields.get('expectedresults')
+    steps = fields.get('steps')
+    expectedresults = fields.get('expectedresults')
     test_steps = None
     if steps and expectedresults:
-        test_steps = ElementTree.Element('test-steps')
+        test_steps = ElementTree.SubElement(element, 'test-steps')
         for step, expectedresult in map_steps(steps, expectedresults):
-            test_step = ElementTree.Element('test-step')
-            test_step_column = ElementTree.Element('test-step-column')
-            test_step_column.set('id', 'step')
-            test_step_column.text = step
-            test_step.append(test_step_column)
-            test_step_column = ElementTree.Element('test-step-column')
-            test_step_column.set('id', 'expectedResult')
-            test_step_column.text = expectedresult
-            test_step.append(test_step_column)
-            test_steps.append(test_step)
+            test_step = ElementTree.SubElement(test_steps, 'test-step')
+            ElementTree.SubElement(
+                test_step, 'test-step-column', {'id': 'step'}).text = step
+            ElementTree.SubElement(
+                test_step, 'test-step-column', {'id': 'expectedResult'}
+            ).text = expectedresult
 
     # Create the permutation parameter if needed
-    if testcase.fields.get('parametrized') == 'yes':
-        parameter = ElementTree.Element('parameter')
-        parameter.set('name', 'pytest parameters')
-        test_steps = test_steps or ElementTree.Element('test-steps')
-        test_step = ElementTree.Element('test-step')
-        test_step_column = ElementTree.Element('test-step-column')
-        test_step_column.set('id', 'step')
+    if fields.get('parametrized') == 'yes':
+        if test_steps is None:
+            test_steps = ElementTree.SubElement(element, 'test-steps')
+        test_step = ElementTree.SubElement(test_steps, 'test-step')
+        test_step_column = ElementTree.SubElement(
+            test_step, 'test-step-column', {'id': 'step'})
         test_step_column.text = 'Iteration: '
-        test_step_column.append(parameter)
-        test_step.append(test_step_column)
-        test_step_column = ElementTree.Element('test-step-column')
-        test_step_column.set('id', 'expectedResult')
-        test_step_column.text = 'Pass'
-        test_step.append(test_step_column)
-        test_steps.append(test_step)
-
-    if test_steps:
-        element.append(test_steps)
+        ElementTree.SubElement(
+            test_step_column, 'parameter', {'name': 'pytest parameters'})
+        ElementTree.SubElement(
+            test_step, 'test-step-column', {'id': 'expectedResult'}
+        ).text = 'Pass'
 
     # Finally include the custom fields
-    custom_fields = ElementTree.Element('custom-fields')
+    custom_fields = ElementTree.SubElement(element, 'custom-fields')
     for field in config.TESTCASE_CUSTOM_FIELDS:
-        if field not in testcase.fields:
+        if field not in fields:
             continue
-        custom_field = ElementTree.Element('custom-field')
-        custom_field.set('content', testcase.fields[field])
-        custom_field.set('id', field)
-        custom_fields.append(custom_field)
-    element.append(custom_fields)
+        ElementTree.SubElement(custom_fields, 'custom-field', {
+            'content': fields[field],
+            'id': field,
+        })
     return element
 
 
@@ -552,19 +747,16 @@ def create_xml_requirement(config, requirement):
     if requirement.fields['severity']:
         element.set('severity-id', requirement.fields['severity'])
 
-    title_element = ElementTree.Element('title')
-    title_element.text = requirement.title
-    element.append(title_element)
+    ElementTree.SubElement(element, 'title').text = requirement.title
 
-    custom_fields = ElementTree.Element('custom-fields')
+    custom_fields = ElementTree.SubElement(element, 'custom-fields')
     for field in config.REQUIREMENT_CUSTOM_FIELDS:
         if field not in requirement.fields:
             continue
-        custom_field = ElementTree.Element('custom-field')
-        custom_field.set('content', requirement.fields[field])
-        custom_field.set('id', field)
-        custom_fields.append(custom_field)
-    element.append(custom_fields)
+        ElementTree.SubElement(custom_fields, 'custom-field', {
+            'content': requirement.fields[field],
+            'id': field,
+        })
 
     return element
 
@@ -590,6 +782,13 @@ def create_xml_requirement(config, requirement):
     help='Indicate to the importer to not make any change.',
     is_flag=True,
 )
+@click.option(
+    '--jobs',
+    default=1,
+    help='Number of processes used to collect the tests from the source '
+    'code. Use 0 to run one process per CPU. Default: 1',
+    type=click.IntRange(min=0),
+)
 @click.option(
     '--lookup-method',
     default='custom',
@@ -619,7 +818,7 @@ def create_xml_requirement(config, requirement):
 @click.argument('output-path')
 @pass_config
 def test_case(
-        config, automation_script_format, collect_ignore_path, dry_run,
+        config, automation_script_format, collect_ignore_path, dry_run, jobs,
         lookup_method, lookup_method_custom_field_id, response_property,
         source_code_path, project, output_path):
     """Generate an XML suited to be importer by the test-case importer.
@@ -634,35 +833,149 @@ def test_case(
     Other test case importer options can be set by the various options this
     command accepts. Check their help for more information.
     """
-    testcases = ElementTree.Element('testcases')
-    testcases.set('project-id', project)
+    testcases = ElementTree.Element('testcases', {'project-id': project})
     if response_property:
-        response_properties = ElementTree.Element('response-properties')
-        element = ElementTree.Element('response-property')
-        element.set('name', response_property[0])
-        element.set('value', response_property[1])
-        response_properties.append(element)
-        testcases.append(response_properties)
-    properties = ElementTree.Element('properties')
-    properties.append(create_xml_property(
-        'dry-run', 'true' if dry_run else 'false'))
-    properties.append(create_xml_property(
-        'lookup-method', lookup_method))
+        response_properties = ElementTree.SubElement(
+            testcases, 'response-properties')
+        ElementTree.SubElement(response_properties, 'response-property', {
+            'name': response_property[0],
+            'value': response_property[1],
+        })
+    properties = ElementTree.SubElement(testcases, 'properties')
+    create_xml_property(
+        'dry-run', 'true' if dry_run else 'false', properties)
+    create_xml_property('lookup-method', lookup_method, properties)
     if lookup_method == 'custom':
-        properties.append(create_xml_property(
+        create_xml_property(
             'polarion-custom-lookup-method-field-id',
-            lookup_method_custom_field_id
-        ))
-    testcases.append(properties)
+            lookup_method_custom_field_id,
+            properties,
+        )
+
+    source_testcases = itertools.chain.from_iterable(collector.collect_tests(
+        source_code_path, collect_ignore_path, config=config,
+        jobs=jobs).values())
+    write_xml(testcases, output_path, (
+        create_xml_testcase(config, testcase, automation_script_format)
+        for testcase in source_testcases
+    ))
+
+
+def _split_junit_test_case_id(testcase):
+    """Return the jUnit ID and the pytest parameters of a testcase element.
+
+    The pytest parameters will be ``None`` if the testcase is not a
+    parametrized one.
+    """
+    junit_test_case_id = (
+        f'{testcase.get("classname")}.{testcase.get("name")}')
+    pytest_parameters = None
+    if '[' in junit_test_case_id:
+        junit_test_case_id, pytest_parameters = junit_test_case_id.split(
+            '[', 1)
+        pytest_parameters = pytest_parameters[:-1]
+    return junit_test_case_id, pytest_parameters
+
+
+def _get_junit_test_case_ids(junit_path):
+    """Return the set of jUnit IDs of the testcases on the jUnit file."""
+    return {
+        _split_junit_test_case_id(testcase)[0]
+        for testcase in _iter_junit_testcases(junit_path)
+    }
+
+
+def _skipped_message(junit_test_case_id):
+    """Return the message for a jUnit ID not found on the source code."""
+    return (
+        'Found {} on jUnit report but not on source code, skipping...'
+        .format(junit_test_case_id)
+    )
+
+
+def add_testcase_properties(testcase, testcases, skipped):
+    """Add the Polarion properties to a jUnit testcase element.
+
+    :param testcase: the jUnit ``testcase`` element.
+    :param testcases: a dict mapping jUnit IDs to ``collector.TestFunction``
+        instances.
+    :param skipped: a list where the jUnit IDs not found on ``testcases``
+        are appended to.
+    """
+    junit_test_case_id, pytest_parameters = _split_junit_test_case_id(
+        testcase)
+    source_test_case = testcases.get(junit_test_case_id)
+    if not source_test_case:
+        skipped.append(junit_test_case_id)
+        return
+    test_properties = ElementTree.SubElement(testcase, 'properties')
+    ElementTree.SubElement(test_properties, 'property', {
+        'name': 'polarion-testcase-id',
+        'value': source_test_case.fields['id'],
+    })
+    if (pytest_parameters and
+            source_test_case.fields.get('parametrized') == 'yes'):
+        ElementTree.SubElement(test_properties, 'property', {
+            'name': 'polarion-parameter-pytest parameters',
+            'value': pytest_parameters,
+        })
+    elif (pytest_parameters and
+          source_test_case.fields.get('parametrized') != 'yes'):
+        click.echo(
+            '{} has a parametrized result of {} but its parametrized '
+            'field is not set to yes. Only one result will be recorded.'
+            .format(junit_test_case_id, pytest_parameters)
+        )
 
-    source_testcases = itertools.chain(*collector.collect_tests(
-        source_code_path, collect_ignore_path, config=config).values())
-    for testcase in source_testcases:
-        testcases.append(
-            create_xml_testcase(config, testcase, automation_script_format))
 
-    et = ElementTree.ElementTree(testcases)
-    et.write(output_path, encoding='utf-8', xml_declaration=True)
+def _iter_junit_testsuite(junit_path, testsuite, testcases, skipped):
+    """Yield the children of the test suite on the jUnit file.
+
+    The jUnit file is parsed incrementally and every child is released once
+    it is consumed, so only one child needs to be in memory at a time. Every
+    testcase gets its Polarion properties before being yielded. The
+    ``testsuite`` element is updated with the tag, attributes, text and tail
+    of the jUnit test suite. The jUnit IDs not found on ``testcases`` are
+    appended to the ``skipped`` list.
+    """
+    junit_testsuite = None
+    testsuite_done = False
+    pending = None
+    depth = 0
+    for event, element in ElementTree.iterparse(
+            junit_path, events=('start', 'end')):
+        # The tail of an element is only known once the next event is parsed,
+        # hold the last child and the test suite tail until then.
+        if pending is not None:
+            yield pending
+            junit_testsuite.remove(pending)
+            pending = None
+        if testsuite_done:
+            testsuite.tail = junit_testsuite.tail
+            return
+        if event == 'start':
+            depth += 1
+            # The test suite is either the root element or the first child
+            # of the testsuites root element
+            if junit_testsuite is None and (
+                    depth == 2 or element.tag != 'testsuites'):
+                junit_testsuite = element
+                testsuite_depth = depth
+                testsuite.tag = element.tag
+                testsuite.attrib.update(element.attrib)
+            continue
+        depth -= 1
+        if element is junit_testsuite:
+            testsuite.text = junit_testsuite.text
+            testsuite_done = True
+        elif junit_testsuite is not None and depth == testsuite_depth:
+            testsuite.text = junit_testsuite.text
+            if element.tag == 'testcase':
+                add_testcase_properties(element, testcases, skipped)
+            pending = element
+    if junit_testsuite is None:
+        raise click.ClickException(
+            'No test suite found on the jUnit file {}'.format(junit_path))
 
 
 @cli.command('test-run')
@@ -690,6 +1003,13 @@ def test_case(
     help='Indicate to the importer to not make any change.',
     is_flag=True,
 )
+@click.option(
+    '--jobs',
+    default=1,
+    help='Number of processes used to collect the tests from the source '
+    'code. Use 0 to run one process per CPU. Default: 1',
+    type=click.IntRange(min=0),
+)
 @click.option(
     '--lookup-method',
     default='custom',
@@ -738,7 +1058,7 @@ def test_case(
 )
 @click.option(
     '--test-run-id',
-    default='test-run-{0}'.format(time.time()),
+    default=lambda: 'test-run-{0}'.format(time.time()),
     help='Test Run ID to be created/updated.',
 )
 @click.option(
@@ -761,7 +1081,7 @@ def test_case(
 @pass_config
 def test_run(
         config, collect_ignore_path, create_defects, custom_fields, dry_run,
-        lookup_method, lookup_method_custom_field_id, no_include_skipped,
+        jobs, lookup_method, lookup_method_custom_field_id, no_include_skipped,
         response_property, status, test_run_group_id, test_run_id,
         test_run_template_id, test_run_title, test_run_type_id, junit_path,
         project_span_ids, source_code_path, user, project, output_path):
@@ -778,18 +1098,15 @@ def test_run(
     Other test run options can be set by the various options this command
     accepts. Check their help for more information.
     """
-    test_run_id = re.sub(INVALID_CHARS_REGEX, '', test_run_id)
+    test_run_id = test_run_id.translate(_INVALID_CHARS_TABLE)
     testsuites = ElementTree.Element('testsuites')
-    properties = ElementTree.Element('properties')
+    properties = ElementTree.SubElement(testsuites, 'properties')
     custom_fields = load_custom_fields(custom_fields)
-    custom_fields.update({
-        'polarion-create-defects':
-            'true' if create_defects else 'false',
-        'polarion-dry-run':
-            'true' if dry_run else 'false',
-        'polarion-include-skipped':
-            'false' if no_include_skipped else 'true',
-    })
+    custom_fields['polarion-create-defects'] = (
+        'true' if create_defects else 'false')
+    custom_fields['polarion-dry-run'] = 'true' if dry_run else 'false'
+    custom_fields['polarion-include-skipped'] = (
+        'false' if no_include_skipped else 'true')
     if response_property:
         key = 'polarion-response-' + response_property[0]
         custom_fields[key] = response_property[1]
@@ -812,74 +1129,33 @@ def test_run(
     if test_run_type_id:
         custom_fields['polarion-testrun-type-id'] = test_run_type_id
     custom_fields['polarion-user-id'] = user
-    properties_names = (
-        'polarion-create-defects',
-        'polarion-custom-lookup-method-field-id',
-        'polarion-dry-run',
-        'polarion-group-id',
-        'polarion-include-skipped',
-        'polarion-lookup-method',
-        'polarion-project-id',
-        'polarion-project-span-ids',
-        'polarion-testrun-id',
-        'polarion-testrun-status-id',
-        'polarion-testrun-template-id',
-        'polarion-testrun-title',
-        'polarion-testrun-type-id',
-        'polarion-user-id',
-    )
     for name, value in custom_fields.items():
-        if (not name.startswith('polarion-custom-') and
-                not name.startswith('polarion-response-') and
-                name not in properties_names):
-            name = 'polarion-custom-{}'.format(name)
-        properties.append(create_xml_property(name, value))
-    testsuites.append(properties)
-
+        if (not name.startswith(TEST_RUN_PROPERTY_PREFIXES) and
+                name not in TEST_RUN_PROPERTIES):
+            name = f'polarion-custom-{name}'
+        create_xml_property(name, value, properties)
+
+    # Only the tests which have a result on the jUnit file need their fields
+    # to be processed.
+    junit_test_case_ids = _get_junit_test_case_ids(junit_path)
     testcases = {}
-    for test in itertools.chain(*collector.collect_tests(
-            source_code_path, collect_ignore_path).values()):
+    for test in itertools.chain.from_iterable(collector.collect_tests(
+            source_code_path, collect_ignore_path, jobs=jobs).values()):
+        if test.junit_id not in junit_test_case_ids:
+            continue
         update_testcase_fields(config, test)
         testcases[test.junit_id] = test
-    testsuite = ElementTree.parse(junit_path).getroot()
-    if testsuite.tag == 'testsuites':
-        testsuite = list(testsuite)[0]
-
-    for testcase in testsuite.iterfind('testcase'):
-        junit_test_case_id = '{0}.{1}'.format(
-            testcase.get('classname'), testcase.get('name'))
-        pytest_parameters = None
-        if '[' in junit_test_case_id:
-            junit_test_case_id, pytest_parameters = junit_test_case_id.split(
-                '[', 1)
-            pytest_parameters = pytest_parameters[:-1]
-        source_test_case = testcases.get(junit_test_case_id)
-        if not source_test_case:
-            click.echo(
-                'Found {} on jUnit report but not on source code, skipping...'
-                .format(junit_test_case_id)
-            )
-            continue
-        test_properties = ElementTree.Element('properties')
-        element = ElementTree.Element('property')
-        element.set('name', 'polarion-testcase-id')
-        element.set('value', source_test_case.fields['id'])
-        test_properties.append(element)
-        if (pytest_parameters and
-                source_test_case.fields.get('parametrized') == 'yes'):
-            element = ElementTree.Element('property')
-            element.set('name', 'polarion-parameter-pytest parameters')
-            element.set('value', pytest_parameters)
-            test_properties.append(element)
-        elif (pytest_parameters and
-              source_test_case.fields.get('parametrized') != 'yes'):
-            click.echo(
-                '{} has a parametrized result of {} but its parametrized '
-                'field is not set to yes. Only one result will be recorded.'
-                .format(junit_test_case_id, pytest_parameters)
-            )
-        testcase.append(test_properties)
-    testsuites.append(testsuite)
-
-    et = ElementTree.ElementTree(testsuites)
-    et.write(output_path, encoding='utf-8', xml_declaration=True)
+    testsuite = ElementTree.SubElement(testsuites, 'testsuite')
+    skipped = []
+    try:
+        write_xml(
+            testsuites,
+            output_path,
+            _iter_junit_testsuite(junit_path, testsuite, testcases, skipped),
+            testsuite,
+        )
+    finally:
+        # Report all the skipped tests at once instead of echoing one message
+        # per test, even if writing the output failed.
+        if skipped:
+            click.echo('\n'.join(map(_skipped_message, skipped)))
@@ -1,18 +1,27 @@
 # coding=utf-8
 """Tools to walk a path and collect test methods and functions."""
 import ast
-import collections
 import fnmatch
 import os
+import re
+from concurrent.futures import ProcessPoolExecutor
 
 from betelgeuse.parser import parse_docstring
 from betelgeuse.parser import parse_markers
 from betelgeuse.source_generator import gen_source
 
 
+# Matches the test module file names, the union of the ``test_*.py`` and
+# ``*_test.py`` patterns
+_TEST_MODULE_REGEX = re.compile('|'.join(
+    fnmatch.translate(pattern) for pattern in ('test_*.py', '*_test.py')))
+
+
 class Requirement(object):
     """Holds information about Requirements."""
 
+    __slots__ = ('title', 'fields')
+
     def __init__(self, title, fields=None):
         """Title is require but initial fields values can be passed."""
         self.title = title
@@ -22,6 +31,27 @@ class Requirement(object):
 class TestFunction(object):
     """Wrapper for ``ast.FunctionDef`` which parse docstring information."""
 
+    # Many instances are created when collecting large source trees, avoid
+    # having a __dict__ for each one of them
+    __slots__ = (
+        'class_decorators',
+        'class_docstring',
+        'decorators',
+        'docstring',
+        'fields',
+        'function_def',
+        'junit_id',
+        'module_def',
+        'module_docstring',
+        'name',
+        'parent_class',
+        'parent_class_def',
+        'pkginit',
+        'pkginit_def',
+        'pkginit_docstring',
+        'testmodule',
+    )
+
     def __init__(
             self, function_def, parent_class=None, testmodule=None,
             config=None
@@ -44,7 +74,7 @@ class TestFunction(object):
             self.parent_class_def = parent_class
             #: If test case is a method then the parent class docstring will be
             #: set, otherwise it will be ``None``
-            self.class_docstring = ast.get_docstring(self.parent_class_def)
+            self.class_docstring = _get_docstring(parent_class)
         else:
             self.parent_class = None
             self.parent_class_def = None
@@ -54,19 +84,24 @@ class TestFunction(object):
         #: The parent module ``ast.Module`` representation.
         self.module_def = testmodule
         #: The parent module docstring
-        self.module_docstring = ast.get_docstring(self.module_def)
+        self.module_docstring = _get_docstring(testmodule)
         #: The ``__init__.py`` path for the package containing the test module
         #: if it existis, or ``None`` otherwise
         self.pkginit = os.path.join(
             os.path.dirname(self.testmodule), '__init__.py')
-        if os.path.exists(self.pkginit):
+        # _get_tests parses the ``__init__.py`` once for all the module tests
+        pkginit = getattr(testmodule, 'pkginit', None)
+        if pkginit is None:
+            pkginit = _parse_pkginit(self.pkginit)
+        pkginit_def, pkginit_docstring = pkginit
+        if pkginit_def is not None:
             #: If ``__init__.py`` module exists, this will be the
             #: ``ast.Module`` representation of that module, it will be
             #: ``None`` otherwise
-            self.pkginit_def = ast.parse(''.join(open(self.pkginit)))
+            self.pkginit_def = pkginit_def
             #: If ``__init__.py`` module exists, this will be the
             #: docstring of that module, it will be ``None`` otherwise
-            self.pkginit_docstring = ast.get_docstring(self.pkginit_def)
+            self.pkginit_docstring = pkginit_docstring
         else:
             self.pkginit = None
             self.pkginit_def = None
@@ -87,10 +122,8 @@ class TestFunction(object):
         #: ``None``
         self.class_decorators = None
         if self.parent_class_def:
-            self.class_decorators = [
-                gen_source(decorator)
-                for decorator in self.parent_class_def.decorator_list
-            ]
+            self.class_decorators = list(
+                _get_decorators(self.parent_class_def))
         self._parse_docstring()
         self._parse_markers(config)
         self.junit_id = self._generate_junit_id()
@@ -122,8 +155,8 @@ class TestFunction(object):
             self.docstring,
         ]
         for docstring in docstrings:
-            if docstring and not isinstance(docstring, type(u'')):
-                docstring = docstring.decode('utf-8')
+            if not docstring:
+                continue
             self.fields.update(parse_docstring(docstring))
 
     def _generate_junit_id(self):
@@ -133,21 +166,64 @@ class TestFunction(object):
         ``path.to.module.ClassName.test_name`` if the test methods is defined
         within a class.
         """
-        test_case_id_parts = [
-            self.testmodule.replace('/', '.').replace('.py', ''),
-            self.name
-        ]
+        test_case_id_parts = [_get_import_path(self.module_def), self.name]
         if self.parent_class is not None:
             test_case_id_parts.insert(-1, self.parent_class)
         return '.'.join(test_case_id_parts)
 
 
+def _get_import_path(module_def):
+    """Return the Python import path notation of the ``module_def`` path.
+
+    ``_get_tests`` sets it once for all the module tests, it is computed from
+    the module path if it was not set.
+    """
+    try:
+        return module_def.import_path
+    except AttributeError:
+        return module_def.path.replace('/', '.').replace('.py', '')
+
+
+def _get_docstring(node):
+    """Return the docstring of ``node``.
+
+    ``_get_tests`` sets the docstring of the module and classes once for all
+    their tests, it is extracted from ``node`` if it was not set.
+    """
+    try:
+        return node.docstring
+    except AttributeError:
+        return ast.get_docstring(node)
+
+
+def _get_decorators(class_def):
+    """Return the decorators source of ``class_def``.
+
+    ``_get_tests`` sets them once for all the methods of the class, they are
+    generated from ``class_def`` if they were not set.
+    """
+    try:
+        return class_def.decorators
+    except AttributeError:
+        return [
+            gen_source(decorator) for decorator in class_def.decorator_list]
+
+
+def _parse_pkginit(path):
+    """Return the ``ast.Module`` and docstring of the ``__init__.py`` at path.
+
+    Both will be ``None`` if the file does not exist.
+    """
+    if not os.path.exists(path):
+        return None, None
+    with open(path, 'rb') as handler:
+        pkginit_def = ast.parse(handler.read())
+    return pkginit_def, ast.get_docstring(pkginit_def)
+
+
 def is_test_module(filename):
     """Indicate if ``filename`` match a test module file name."""
-    for pat in ('test_*.py', '*_test.py'):
-        if fnmatch.fnmatch(filename, pat):
-            return True
-    return False
+    return _TEST_MODULE_REGEX.match(os.path.normcase(filename)) is not None
 
 
 def _module_markers(module_def):
@@ -157,34 +233,49 @@ def _module_markers(module_def):
     """
     markers = []
     for node in module_def.body:
-        if isinstance(node, ast.Assign):
-            for target in node.targets:
-                if isinstance(target, ast.Name) and target.id == 'pytestmark':
-                    if isinstance(node.value, ast.List):
-                        for item in node.value.elts:
-                            if isinstance(item, ast.Attribute):
-                                markers.append(item.attr)
-                    elif isinstance(node.value, ast.Attribute):
-                        markers.append(node.value.attr)
+        if not isinstance(node, ast.Assign) or not any(
+                isinstance(target, ast.Name) and target.id == 'pytestmark'
+                for target in node.targets):
+            continue
+        if isinstance(node.value, ast.List):
+            markers.extend(
+                item.attr for item in node.value.elts
+                if isinstance(item, ast.Attribute)
+            )
+        elif isinstance(node.value, ast.Attribute):
+            markers.append(node.value.attr)
     return markers or None
 
 
 def _get_tests(path, config=None):
     """Collect tests for the test module located at ``path``."""
     tests = []
-    with open(path) as handler:
-        root = ast.parse(handler.read())
+    # Let ast.parse decode the source, it honors the encoding declaration
+    with open(path, 'rb') as handler:
+        root = ast.parse(handler.read(), path)
         root.path = path  # TODO improve how to pass the path to TestFunction
+        root.import_path = _get_import_path(root)
+        # All the tests of the module share its docstring and package
+        root.docstring = ast.get_docstring(root)
+        root.pkginit = _parse_pkginit(
+            os.path.join(os.path.dirname(path), '__init__.py'))
         # Updating test module with module level markers
         root.__dict__['marker_list'] = _module_markers(root)
-        for node in ast.iter_child_nodes(root):
+        # Test functions and methods can only be defined on the module and
+        # class bodies
+        for node in root.body:
             if isinstance(node, ast.ClassDef):
-                [
-                    tests.append(TestFunction(subnode, node, root, config))
-                    for subnode in ast.iter_child_nodes(node)
-                    if isinstance(subnode, ast.FunctionDef) and
-                    subnode.name.startswith('test_')
+                # All the methods of the class share its docstring and
+                # decorators
+                node.docstring = ast.get_docstring(node)
+                node.decorators = [
+                    gen_source(decorator) for decorator in node.decorator_list
                 ]
+                for subnode in node.body:
+                    if (isinstance(subnode, ast.FunctionDef) and
+                            subnode.name.startswith('test_')):
+                        tests.append(
+                            TestFunction(subnode, node, root, config))
             elif (isinstance(node, ast.FunctionDef) and
                     node.name.startswith('test_')):
                 tests.append(TestFunction(
@@ -192,29 +283,49 @@ def _get_tests(path, config=None):
     return tests
 
 
-def collect_tests(path, ignore_paths=None, config=None):
+def _iter_test_modules(path, ignore_paths):
+    """Walk ``path`` and yield the test module paths found."""
+    if os.path.isfile(path) and path not in ignore_paths:
+        if is_test_module(os.path.basename(path)):
+            yield path
+            return
+    if path in ignore_paths:
+        return
+    for dirpath, dirnames, filenames in os.walk(path):
+        # Prune the ignored directories so their subtrees are not walked
+        dirnames[:] = [
+            dirname for dirname in dirnames
+            if os.path.join(dirpath, dirname) not in ignore_paths
+        ]
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            if path in ignore_paths:
+                continue
+            if is_test_module(filename):
+                yield path
+
+
+def collect_tests(path, ignore_paths=None, config=None, jobs=1):
     """Walk ``path`` and collect test methods and functions found.
 
     :param config: The config object of `config.BetelgeuseConfig`
     :param path: Either a file or directory path to look for test methods and
         functions.
+    :param jobs: The number of processes used to parse the test modules. If
+        ``None`` or ``0``, the number of CPUs is used. The test modules are
+        parsed on the current process if it is ``1``.
     :return: A dict mapping a test module path and its test cases.
     """
     path = os.path.normpath(path)
-    if not ignore_paths:
-        ignore_paths = ()
-    tests = collections.OrderedDict()
-    if os.path.isfile(path) and path not in ignore_paths:
-        if is_test_module(os.path.basename(path)):
-            tests[path] = _get_tests(path, config)
-            return tests
-    for dirpath, _, filenames in os.walk(path):
-        if dirpath in ignore_paths:
-            continue
-        for filename in filenames:
-            path = os.path.join(dirpath, filename)
-            if path in ignore_paths:
-                continue
-            if is_test_module(filename):
-                tests[path] = _get_tests(path, config)
-    return tests
+    ignore_paths = frozenset(ignore_paths or ())
+    paths = list(_iter_test_modules(path, ignore_paths))
+    if jobs == 1 or len(paths) < 2:
+        return {path: _get_tests(path, config) for path in paths}
+    # Send the test modules to the workers in chunks to save inter process
+    # communication. As multiprocessing.Pool.map does, aim for about four
+    # chunks per worker so they stay balanced when some modules take longer.
+    workers = jobs or os.cpu_count() or 1
+    chunksize = max(1, len(paths) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=jobs or None) as executor:
+        return dict(zip(paths, executor.map(
+            _get_tests, paths, [config] * len(paths), chunksize=chunksize)))
@@ -14,9 +14,7 @@ class BetelgeuseConfig(object):
     def __init__(self, config_module=None):
         """Initialize the configuration."""
         self._config_module = None
-        for config in dir(default_config):
-            if config.isupper():
-                setattr(self, config, getattr(default_config, config))
+        self._update(default_config)
         if config_module is not None:
             try:
                 self._config_module = importlib.import_module(config_module)
@@ -27,6 +25,23 @@ class BetelgeuseConfig(object):
                     .format(config_module)
                 )
 
-            for config in dir(self._config_module):
-                if config.isupper():
-                    setattr(self, config, getattr(self._config_module, config))
+            self._update(self._config_module)
+
+    def _update(self, module):
+        """Update the configuration with the upper case names of module."""
+        self.__dict__.update(
+            (name, value) for name, value in vars(module).items()
+            if name.isupper()
+        )
+
+    def __reduce__(self):
+        """Pickle the config by its module name.
+
+        The values copied from the config module may not be picklable, for
+        example lambdas, so the config is built again by importing the module
+        when unpickling.
+        """
+        config_module = None
+        if self._config_module is not None:
+            config_module = self._config_module.__name__
+        return (BetelgeuseConfig, (config_module,))
@@ -1,18 +1,51 @@
 """Parsers for test docstrings."""
+import copy
+import functools
 import re
 from collections import namedtuple
 from io import StringIO
 from xml.dom import minidom
 
-from docutils.core import publish_parts
-from docutils.parsers.rst import nodes, roles
+from docutils.core import Publisher, publish_parts
+from docutils.parsers.rst import Parser, nodes, roles
 from docutils.readers import standalone
 from docutils.transforms import frontmatter
+from docutils.utils import DependencyList
 from docutils.writers import html5_polyglot as writer
 
 
 RSTParseMessage = namedtuple('RSTParseMessage', 'line level message')
 
+# Docutils settings overrides used when parsing RST strings
+_RST_SETTINGS_OVERRIDES = {
+    'embed_stylesheet': False,
+    'input_encoding': 'utf-8',
+    'syntax_highlight': 'short',
+    # Propagate exceptions as docutils does when used programmatically
+    'traceback': True,
+}
+
+# Matches any text which may be a RST field marker, before docutils expands
+# tabs and splits lines. Docstrings without any match can't have a field list.
+_FIELD_MARKER_REGEX = re.compile(r':[^: \n][^\n]*:')
+
+# Matches a line with a field whose name and value are plain text
+_PLAIN_FIELD_REGEX = re.compile(
+    r':([A-Za-z0-9_-]+(?: [A-Za-z0-9_-]+)*):(?: +(.*?))? *$')
+
+# Matches a line starting with a RST enumerated list item
+_RST_ENUMERATOR_REGEX = re.compile(
+    r'(\d+|[A-Za-z]|[ivxlcdmIVXLCDM]+|#)[.)]( |$)')
+
+# Matches the characters other than a new line that docutils handles as line
+# breaks or replaces with spaces
+_LINE_BREAK_REGEX = re.compile(r'[\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029]')
+
+# Matches any text that could be RST inline markup, a reference or a
+# hyperlink, or a character docutils would change
+_RST_MARKUP_REGEX = re.compile(
+    r'[*`|\[\]\\<>:@\x00-\x09\x0b-\x1f]|_(?![A-Za-z0-9])')
+
 
 class TableFieldListTranslator(writer.HTMLTranslator):
     """An HTML 5 translator which creates field lists as HTML tables."""
@@ -99,24 +132,41 @@ def _register_roles():
         roles.register_generic_role('py:' + role, nodes.raw)
 
 
+@functools.lru_cache(maxsize=None)
+def _get_rst_settings():
+    """Return the docutils settings used to parse RST strings.
+
+    Docutils builds its settings with an option parser on every publish call,
+    which is slower than parsing most docstrings. Build them only once, they
+    must be copied before being changed. The Python roles are registered here
+    too so that happens only once as well.
+    """
+    _register_roles()
+    publisher = Publisher(NoDocInfoReader(), Parser(), HTMLWriter())
+    publisher.process_programmatic_settings(
+        None, _RST_SETTINGS_OVERRIDES, None)
+    return publisher.settings
+
+
+@functools.lru_cache(maxsize=2048)
 def parse_rst(string, translator_class=None):
-    """Parse a RST formatted string into HTML."""
+    """Parse a RST formatted string into HTML.
+
+    Results are cached since the same docstring is usually parsed more than
+    once, for example a module docstring is parsed for every test on the
+    module and a test docstring is parsed again for its default description.
+    """
     if not string:
         return ''
-    if not hasattr(_register_roles, '_roles_registered'):
-        _register_roles()
-        _register_roles._roles_registered = True
 
     warning_stream = StringIO()
+    settings = copy.copy(_get_rst_settings())
+    settings.warning_stream = warning_stream
+    settings.record_dependencies = DependencyList()
     parts = publish_parts(
         string,
         reader=NoDocInfoReader(),
-        settings_overrides={
-            'embed_stylesheet': False,
-            'input_encoding': 'utf-8',
-            'syntax_highlight': 'short',
-            'warning_stream': warning_stream,
-        },
+        settings=settings,
         writer=HTMLWriter(translator_class=translator_class),
     )
 
@@ -136,6 +186,51 @@ def parse_rst(string, translator_class=None):
     return parts['html_body']
 
 
+def _parse_plain_docstring(docstring):
+    """Return the fields of a docstring which holds only plain text fields.
+
+    This skips docutils for the common case of docstrings made of plain
+    paragraphs and single line fields without any markup. ``None`` is returned
+    if the docstring has anything else, like indented blocks, lists, section
+    titles or inline markup, and must be parsed by docutils.
+    """
+    if _LINE_BREAK_REGEX.search(docstring):
+        return None
+    fields = {}
+    # Fields are only part of a field list if they start the docstring or
+    # follow a blank line or another field, otherwise they are part of the
+    # paragraph above.
+    starts_block = True
+    for line in docstring.split('\n'):
+        if not line.strip():
+            starts_block = True
+            continue
+        if not starts_block or not _FIELD_MARKER_REGEX.match(line):
+            # Inline markup can't leave its paragraph, only check if the line
+            # starts a list or any other RST construct
+            if (not line[0].isalnum() or
+                    _RST_ENUMERATOR_REGEX.match(line)):
+                return None
+            starts_block = False
+            continue
+        match = _PLAIN_FIELD_REGEX.match(line)
+        if match is None:
+            return None
+        name, value = match.groups()
+        # Names may be references too, like ``name_``
+        if _RST_MARKUP_REGEX.search(name):
+            return None
+        # Docutils strips any trailing whitespace, not only spaces
+        value = value.rstrip() if value else value
+        if (not value or
+                not value[0].isalnum() or
+                _RST_ENUMERATOR_REGEX.match(value) or
+                _RST_MARKUP_REGEX.search(value)):
+            return None
+        fields[name.lower()] = value
+    return fields
+
+
 def parse_docstring(docstring=None):
     """Parse the docstring and return captured fields.
 
@@ -158,14 +253,25 @@ def parse_docstring(docstring=None):
             'field3': 'value3',
         }
     """
-    if not docstring:
+    if not docstring or not _FIELD_MARKER_REGEX.search(docstring):
         return {}
+    return dict(_parse_docstring_fields(docstring))
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_docstring_fields(docstring):
+    """Return the fields of ``docstring``.
+
+    Results are cached since many tests share the same package, module and
+    class docstrings or even the same test docstring. The returned dict must
+    not be changed, ``parse_docstring`` returns a copy of it.
+    """
+    fields_dict = _parse_plain_docstring(docstring)
+    if fields_dict is not None:
+        return fields_dict
 
     fields_dict = {}
-    parsed_docstring = parse_rst(docstring)
-    if isinstance(parsed_docstring, type(u'')):
-        parsed_docstring = parsed_docstring.encode('utf-8')
-    document = minidom.parseString(parsed_docstring)
+    document = minidom.parseString(parse_rst(docstring).encode('utf-8'))
     field_lists = [
         element for element in document.getElementsByTagName('dl')
         if element.attributes.get('class') and
@@ -176,17 +282,14 @@ def parse_docstring(docstring=None):
         field_values = field_list.getElementsByTagName('dd')
         for field_name, field_value in zip(field_names, field_values):
             field_name = field_name.firstChild.nodeValue.lower()
-            output = ''
-            if (len(field_value.childNodes) == 2 and
-                    field_value.childNodes[0].tagName == 'p'):
+            child_nodes = field_value.childNodes
+            if len(child_nodes) == 2 and child_nodes[0].tagName == 'p':
                 # childNodes will have two items because the first item will be
                 # an element and the second item will be a text u'\n'
-                output = field_value.childNodes[0].firstChild.nodeValue
+                output = child_nodes[0].firstChild.nodeValue
             else:
-                for node in field_value.childNodes:
-                    output += node.toxml()
-            field_value = output
-            fields_dict[field_name] = field_value
+                output = ''.join(node.toxml() for node in child_nodes)
+            fields_dict[field_name] = output
     return fields_dict
 
 
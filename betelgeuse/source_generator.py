@@ -4,7 +4,6 @@ Inpired by the ast.NodeVisitor and unparse.py (see
 https://github.com/python/cpython/blob/master/Tools/parser/unparse.py)
 """
 import ast
-import io
 import sys
 
 # Large float and imaginary literals get turned into infinities in the AST.  We
@@ -17,10 +16,10 @@ class SourceGenerator():
 
     def __init__(self, node):
         """Make  the generated source code available on the ``source`` attr."""
-        self._source = io.StringIO('')
+        self._chunks = []
+        self.write = self._chunks.append
         self._visit(node)
-        self.source = self._source.getvalue()
-        self._source.close()
+        self.source = ''.join(self._chunks)
 
     def _visit(self, node):
         visitor = getattr(self, f'_visit_{node.__class__.__name__}'.lower())
@@ -39,32 +38,32 @@ class SourceGenerator():
 
     def _visit_attribute(self, node):
         self._visit(node.value)
-        self._source.write(f'.{node.attr}')
+        self.write(f'.{node.attr}')
 
     def _visit_call(self, node):
         self._visit(node.func)
-        self._source.write('(')
+        self.write('(')
         comma = False
         for arg in node.args:
             if comma:
-                self._source.write(', ')
+                self.write(', ')
             else:
                 comma = True
             self._visit(arg)
         for keyword in node.keywords:
             if comma:
-                self._source.write(', ')
+                self.write(', ')
             else:
                 comma = True
             self._visit(keyword)
-        self._source.write(')')
+        self.write(')')
 
     def _write_constant(self, value):
         if isinstance(value, (float, complex)):
             # Substitute overflowing decimal literal for AST infinities.
-            self._source.write(repr(value).replace('inf', INFSTR))
+            self.write(repr(value).replace('inf', INFSTR))
         else:
-            self._source.write(repr(value))
+            self.write(repr(value))
 
     def _visit_constant(self, t):
         value = t.value
@@ -75,7 +74,7 @@ class SourceGenerator():
                 self.write(',')
             else:
                 self._iterate_seq(
-                    lambda: self._source.write(', '),
+                    lambda: self.write(', '),
                     self._write_constant,
                     value
                 )
@@ -88,29 +87,29 @@ class SourceGenerator():
             self._write_constant(t.value)
 
     def _visit_name(self, node):
-        self._source.write(node.id)
+        self.write(node.id)
 
     def _visit_str(self, node):
-        self._source.write(repr(node.s))
+        self.write(repr(node.s))
 
     def _visit_tuple(self, node):
-        self._source.write('(')
+        self.write('(')
         if len(node.elts) == 1:
             self._visit(node.elts[0])
-            self._source.write(',')
+            self.write(',')
         else:
             self._iterate_seq(
-                lambda: self._source.write(', '), self._visit, node.elts)
-        self._source.write(')')
+                lambda: self.write(', '), self._visit, node.elts)
+        self.write(')')
 
     def _visit_bytes(self, node):
-        self._source.write(repr(node.s))
+        self.write(repr(node.s))
 
     def _visit_joinedstr(self, node):
-        self._source.write('f')
-        string = io.StringIO()
-        self._fstring_joinedstr(node, string.write)
-        self._source.write(repr(string.getvalue()))
+        self.write('f')
+        chunks = []
+        self._fstring_joinedstr(node, chunks.append)
+        self.write(repr(''.join(chunks)))
 
     def _fstring_joinedstr(self, node, write):
         for value in node.values:
@@ -142,78 +141,78 @@ class SourceGenerator():
         write('}')
 
     def _visit_nameconstant(self, node):
-        self._source.write(repr(node.value))
+        self.write(repr(node.value))
 
     def _visit_num(self, node):
         # Substitute overflowing decimal literal for AST infinities.
-        self._source.write(repr(node.n).replace('inf', INFSTR))
+        self.write(repr(node.n).replace('inf', INFSTR))
 
     def _visit_list(self, node):
-        self._source.write('[')
+        self.write('[')
         self._iterate_seq(
-            lambda: self._source.write(', '), self._visit, node.elts)
-        self._source.write(']')
+            lambda: self.write(', '), self._visit, node.elts)
+        self.write(']')
 
     def _visit_listcomp(self, node):
-        self._source.write('[')
+        self.write('[')
         self._visit(node.elt)
         for gen in node.generators:
             self._visit(gen)
-        self._source.write(']')
+        self.write(']')
 
     def _visit_generatorexp(self, node):
-        self._source.write('(')
+        self.write('(')
         self._visit(node.elt)
         for gen in node.generators:
             self._visit(gen)
-        self._source.write(')')
+        self.write(')')
 
     def _visit_setcomp(self, node):
-        self._source.write('{')
+        self.write('{')
         self._visit(node.elt)
         for gen in node.generators:
             self._visit(gen)
-        self._source.write('}')
+        self.write('}')
 
     def _visit_dictcomp(self, node):
-        self._source.write('{')
+        self.write('{')
         self._visit(node.key)
-        self._source.write(': ')
+        self.write(': ')
         self._visit(node.value)
         for gen in node.generators:
             self._visit(gen)
-        self._source.write('}')
+        self.write('}')
 
     def _visit_comprehension(self, node):
-        self._source.write(' for ')
+        self.write(' for ')
         self._visit(node.target)
-        self._source.write(' in ')
+        self.write(' in ')
         self._visit(node.iter)
         for if_clause in node.ifs:
-            self._source.write(' if ')
+            self.write(' if ')
             self._visit(if_clause)
 
     def _visit_ifexp(self, node):
-        self._source.write('(')
+        self.write('(')
         self._visit(node.body)
-        self._source.write(' if ')
+        self.write(' if ')
         self._visit(node.test)
-        self._source.write(' else ')
+        self.write(' else ')
         self._visit(node.orelse)
-        self._source.write(')')
+        self.write(')')
 
     def _visit_set(self, node):
-        self._source.write('{')
+        self.write('{')
         self._iterate_seq(
-            lambda: self._source.write(', '), self._visit, node.elts)
-        self._source.write('}')
+            lambda: self.write(', '), self._visit, node.elts)
+        self.write('}')
 
     def _visit_dict(self, node):
-        self._source.write('{')
+        self.write('{')
 
         def write_key_value_pair(k, v):
             self._visit(k)
-            self._source.write(': ')
+            self.write(': ')
             self._visit(v)
 
         def write_item(item):
@@ -221,25 +220,25 @@ class SourceGenerator():
             if k is None:
                 # for dictionary unpacking operator in dicts {**{'y': 2}} see
                 # PEP 448 for details
-                self._source.write('**')
+                self.write('**')
                 self._visit(v)
             else:
                 write_key_value_pair(k, v)
         self._iterate_seq(
-            lambda: self._source.write(', '),
+            lambda: self.write(', '),
             write_item,
             zip(node.keys, node.values)
         )
-        self._source.write('}')
+        self.write('}')
 
     unop = {'Invert': '~', 'Not': 'not', 'UAdd': '+', 'USub': '-'}
 
     def _visit_unaryop(self, node):
-        self._source.write('(')
-        self._source.write(self.unop[node.op.__class__.__name__])
-        self._source.write(' ')
+        self.write('(')
+        self.write(self.unop[node.op.__class__.__name__])
+        self.write(' ')
         self._visit(node.operand)
-        self._source.write(')')
+        self.write(')')
 
     binop = {
         'Add': '+', 'Sub': '-', 'Mult': '*', 'MatMult': '@', 'Div': '/', 'Mod':
@@ -248,11 +247,11 @@ class SourceGenerator():
     }
 
     def _visit_binop(self, node):
-        self._source.write('(')
+        self.write('(')
         self._visit(node.left)
-        self._source.write(' ' + self.binop[node.op.__class__.__name__] + ' ')
+        self.write(' ' + self.binop[node.op.__class__.__name__] + ' ')
         self._visit(node.right)
-        self._source.write(')')
+        self.write(')')
 
     cmpops = {
         'Eq': '==', 'NotEq': '!=', 'Lt': '<', 'LtE': '<=', 'Gt': '>', 'GtE':
@@ -260,30 +259,30 @@ class SourceGenerator():
     }
 
     def _visit_compare(self, node):
-        self._source.write('(')
+        self.write('(')
         self._visit(node.left)
         for o, e in zip(node.ops, node.comparators):
-            self._source.write(' ' + self.cmpops[o.__class__.__name__] + ' ')
+            self.write(' ' + self.cmpops[o.__class__.__name__] + ' ')
             self._visit(e)
-        self._source.write(')')
+        self.write(')')
 
     boolops = {ast.And: 'and', ast.Or: 'or'}
 
     def _visit_boolop(self, node):
-        self._source.write('(')
+        self.write('(')
         s = f' {self.boolops[node.op.__class__]} '
         self._iterate_seq(
-            lambda: self._source.write(s), self._visit, node.values)
-        self._source.write(')')
+            lambda: self.write(s), self._visit, node.values)
+        self.write(')')
 
     def _visit_subscript(self, node):
         self._visit(node.value)
-        self._source.write('[')
+        self.write('[')
         self._visit(node.slice)
-        self._source.write(']')
+        self.write(']')
 
     def _visit_starred(self, node):
-        self._source.write('*')
+        self.write('*')
         self._visit(node.value)
 
     def _visit_index(self, node):
@@ -292,15 +291,15 @@ class SourceGenerator():
     def _visit_slice(self, node):
         if node.lower:
             self._visit(node.lower)
-        self._source.write(':')
+        self.write(':')
         if node.upper:
             self._visit(node.upper)
         if node.step:
-            self._source.write(':')
+            self.write(':')
             self._visit(node.step)
 
     def _visit_arg(self, node):
-        self._source.write(node.arg)
+        self.write(node.arg)
 
     def _visit_arguments(self, node):
         first = True
@@ -311,10 +310,10 @@ class SourceGenerator():
             if first:
                 first = False
             else:
-                self._source.write(', ')
+                self.write(', ')
             self._visit(a)
             if d:
-                self._source.write('=')
+                self.write('=')
                 self._visit(d)
 
         # varargs, or bare '*' if no varargs but keyword-only arguments present
@@ -322,12 +321,12 @@ class SourceGenerator():
             if first:
                 first = False
             else:
-                self._source.write(', ')
-            self._source.write('*')
+                self.write(', ')
+            self.write('*')
             if node.vararg:
-                self._source.write(node.vararg.arg)
+                self.write(node.vararg.arg)
                 if node.vararg.annotation:
-                    self._source.write(': ')
+                    self.write(': ')
                     self._visit(node.vararg.annotation)
 
         # keyword-only arguments
@@ -336,10 +335,10 @@ class SourceGenerator():
                 if first:
                     first = False
                 else:
-                    self._source.write(', ')
+                    self.write(', ')
                 self._visit(a)
                 if d:
-                    self._source.write('=')
+                    self.write('=')
                     self._visit(d)
 
         # kwargs
@@ -347,27 +346,27 @@ class SourceGenerator():
             if first:
                 first = False
             else:
-                self._source.write(', ')
-            self._source.write(f'**{node.kwarg.arg}')
+                self.write(', ')
+            self.write(f'**{node.kwarg.arg}')
             if node.kwarg.annotation:
-                self._source.write(': ')
+                self.write(': ')
                 self._visit(node.kwarg.annotation)
 
     def _visit_keyword(self, node):
         if node.arg is None:
-            self._source.write('**')
+            self.write('**')
         else:
-            self._source.write(node.arg)
-            self._source.write('=')
+            self.write(node.arg)
+            self.write('=')
         self._visit(node.value)
 
     def _visit_lambda(self, node):
-        self._source.write('(')
-        self._source.write('lambda ')
+        self.write('(')
+        self.write('lambda ')
         self._visit(node.args)
-        self._source.write(': ')
+        self.write(': ')
         self._visit(node.body)
-        self._source.write(')')
+        self.write(')')
 
 
 def gen_source(node):
@@ -18,6 +18,7 @@ from betelgeuse import (
     parse_junit,
     parse_test_results,
     validate_key_value_option,
+    write_xml,
 )
 from betelgeuse.config import BetelgeuseConfig
 from io import StringIO
@@ -126,6 +127,29 @@ def test_get_multiple_steps_diff_items():
         )]
 
 
+def test_map_steps_minidom_serialization():
+    """Check if mapped steps are serialized the same way minidom does."""
+    steps = (
+        '<ol>\n'
+        '  <li>Run <code>"hammer host list"</code> &amp; check</li>\n'
+        '  <li><p>Line<br/>break</p></li>\n'
+        '</ol>\n'
+    )
+    expectedresults = (
+        '<ol>\n'
+        '  <li>Host "name" is listed</li>\n'
+        '  <li><p>Empty <em></em> element</p></li>\n'
+        '</ol>\n'
+    )
+    assert map_steps(steps, expectedresults) == [
+        ('Run ', 'Host &quot;name&quot; is listed'),
+        ('<p>Line<br/>break</p>', '<p>Empty <em/> element</p>'),
+    ]
+    assert map_steps(
+        '<p>Run <a href="a&quot;b">"it"</a></p>', '<p>Done</p>'
+    ) == [('<p>Run <a href="a&quot;b">&quot;it&quot;</a></p>', '<p>Done</p>')]
+
+
 def test_parse_junit():
     """Check if jUnit parsing works."""
     junit_xml = StringIO(JUNIT_XML)
@@ -147,6 +171,25 @@ def test_parse_junit():
     junit_xml.close()
 
 
+def test_parse_junit_releases_testcases():
+    """Check if jUnit parsing removes the testcases from the tree."""
+    iterparse = ElementTree.iterparse
+    iterators = []
+
+    def tracked_iterparse(*args, **kwargs):
+        iterator = iterparse(*args, **kwargs)
+        iterators.append(iterator)
+        return iterator
+
+    junit_xml = StringIO(f'<testsuites>{JUNIT_XML}</testsuites>')
+    with mock.patch.object(ElementTree, 'iterparse', tracked_iterparse):
+        assert len(parse_junit(junit_xml)) == 7
+    root = iterators[0].root
+    assert root.findall('.//testcase') == []
+    assert [element.tag for element in root.iter()] == [
+        'testsuites', 'testsuite']
+
+
 def test_invalid_test_run_chars_regex():
     """Check if invalid test run characters are handled."""
     invalid_test_run_id = '\\/.:*"<>|~!@#$?%^&\'*()+`,='
@@ -416,7 +459,8 @@ def test_test_run(cli_runner):
                 ]
             )
             assert result.exit_code == 0, result.output
-            collector.collect_tests.assert_called_once_with('source.py', ())
+            collector.collect_tests.assert_called_once_with(
+                'source.py', (), jobs=1)
             assert os.path.isfile('importer.xml')
             root = ElementTree.parse('importer.xml').getroot()
             assert root.tag == 'testsuites'
@@ -479,6 +523,82 @@ def test_test_run(cli_runner):
                     assert p[1].attrib['value'] in ('a', 'b')
 
 
+def _invoke_test_run(cli_runner, junit_xml, output_path='importer.xml'):
+    """Run the test-run command on ``junit_xml`` without any source test."""
+    with open('junit_report.xml', 'w') as handler:
+        handler.write(junit_xml)
+    with mock.patch('betelgeuse.collector') as collector:
+        collector.collect_tests.return_value = {}
+        return cli_runner.invoke(cli, [
+            'test-run',
+            '--test-run-id', 'test-run-id',
+            'junit_report.xml',
+            '.',
+            'userid',
+            'projectid',
+            output_path,
+        ])
+
+
+@pytest.mark.parametrize('junit_xml,testsuite_xml', (
+    (
+        '<testsuites>\n'
+        '  <testsuite name="a" tests="1">\n'
+        '    <properties><property name="p" value="v"/></properties>\n'
+        '    <testcase classname="foo" name="test_a"/>\n'
+        '    text\n'
+        '    <system-out>out</system-out>\n'
+        '  </testsuite>\n'
+        '  <testsuite name="b"/>\n'
+        '</testsuites>\n',
+        '<testsuite name="a" tests="1">\n'
+        '    <properties><property name="p" value="v" /></properties>\n'
+        '    <testcase classname="foo" name="test_a" />\n'
+        '    text\n'
+        '    <system-out>out</system-out>\n'
+        '  </testsuite>\n'
+        '  </testsuites>',
+    ),
+    ('<testsuite name="x"/>', '<testsuite name="x" /></testsuites>'),
+    (
+        '<testsuite name="x">\n</testsuite>',
+        '<testsuite name="x">\n</testsuite></testsuites>',
+    ),
+), ids=('testsuites', 'empty', 'empty-text'))
+def test_test_run_junit_testsuite(cli_runner, junit_xml, testsuite_xml):
+    """Check if test run copies the jUnit test suite as it is."""
+    with cli_runner.isolated_filesystem():
+        result = _invoke_test_run(cli_runner, junit_xml)
+        assert result.exit_code == 0, result.output
+        with open('importer.xml') as handler:
+            importer_xml = handler.read()
+        assert importer_xml.split('</properties>', 1)[1] == testsuite_xml
+
+
+def test_test_run_junit_missing_testsuite(cli_runner):
+    """Check if test run fails when the jUnit file has no test suite."""
+    with cli_runner.isolated_filesystem():
+        result = _invoke_test_run(cli_runner, '<testsuites/>')
+        assert result.exit_code == 1
+        assert 'No test suite found on the jUnit file' in result.output
+        assert not os.path.exists('importer.xml')
+
+
+def test_test_run_write_error_skipped(cli_runner):
+    """Check if test run reports the skipped tests when writing fails."""
+    with cli_runner.isolated_filesystem():
+        result = _invoke_test_run(
+            cli_runner,
+            '<testsuite><testcase classname="foo" name="test_a"/></testsuite>',
+            os.path.join('missing', 'importer.xml'),
+        )
+        assert isinstance(result.exception, FileNotFoundError)
+        assert result.output == (
+            'Found foo.test_a on jUnit report but not on source code, '
+            'skipping...\n'
+        )
+
+
 def test_validate_key_value_option():
     """Check if validate_key_value_option works."""
     # None value will be passed when the option is not specified.
@@ -496,3 +616,60 @@ def test_validate_key_value_option_exception():
         with pytest.raises(click.BadParameter) as excinfo:
             validate_key_value_option(None, option, value)
         assert excinfo.value.message == msg
+
+
+def test_write_xml(tmp_path):
+    """Check if write_xml streams the subelements into the document."""
+    root = ElementTree.Element('root', {'project-id': 'project'})
+    ElementTree.SubElement(root, 'properties')
+    subelements = (
+        ElementTree.Element('child', {'id': str(index)})
+        for index in range(3)
+    )
+    output_path = tmp_path / 'output.xml'
+    write_xml(root, output_path, subelements)
+    assert output_path.read_text() == (
+        "<?xml version='1.0' encoding='utf-8'?>\n"
+        '<root project-id="project"><properties />'
+        '<child id="0" /><child id="1" /><child id="2" /></root>'
+    )
+    assert len(root) == 1
+
+
+def test_write_xml_subelements_error(tmp_path):
+    """Check if write_xml cleans up the tree when streaming fails."""
+    root = ElementTree.Element('root')
+    ElementTree.SubElement(root, 'properties')
+
+    def subelements():
+        yield ElementTree.Element('child')
+        raise ValueError('no more children')
+
+    with pytest.raises(ValueError, match='no more children'):
+        write_xml(root, tmp_path / 'output.xml', subelements())
+    assert [child.tag for child in root] == ['properties']
+
+
+def test_write_xml_first_subelement_error(tmp_path):
+    """Check if write_xml leaves the path untouched on the first error."""
+    def subelements():
+        raise ValueError('no children')
+        yield
+
+    output_path = tmp_path / 'output.xml'
+    output_path.write_text('previous content')
+    with pytest.raises(ValueError, match='no children'):
+        write_xml(ElementTree.Element('root'), output_path, subelements())
+    assert output_path.read_text() == 'previous content'
+
+
+def test_write_xml_symlink(tmp_path):
+    """Check if write_xml writes through a symlinked output path."""
+    target_path = tmp_path / 'target.xml'
+    target_path.write_text('')
+    output_path = tmp_path / 'output.xml'
+    output_path.symlink_to(target_path)
+    write_xml(ElementTree.Element('root'), output_path)
+    assert output_path.is_symlink()
+    assert target_path.read_text() == (
+        "<?xml version='1.0' encoding='utf-8'?>\n<root />")
@@ -1,8 +1,12 @@
 # coding=utf-8
 """Tests for :mod:`betelgeuse.collector`."""
+import ast
+import pickle
+
 import pytest
 
 from betelgeuse import collector
+from betelgeuse.config import BetelgeuseConfig
 
 
 @pytest.mark.parametrize(
@@ -33,6 +37,18 @@ def test_collect_ignore_path(ignore_path):
     assert len(tests['tests/data/test_sample.py']) == 5
 
 
+def test_collect_ignore_path_subdirectories(tmp_path):
+    """Check if ``collect_tests`` don't walk the ignored directories."""
+    ignore_dir = tmp_path / 'ignore_dir'
+    (ignore_dir / 'subdir').mkdir(parents=True)
+    (ignore_dir / 'subdir' / 'test_ignored.py').write_text(
+        'def test_ignored():\n    pass\n')
+    (tmp_path / 'test_collected.py').write_text(
+        'def test_collected():\n    pass\n')
+    tests = collector.collect_tests(str(tmp_path), [str(ignore_dir)])
+    assert list(tests) == [str(tmp_path / 'test_collected.py')]
+
+
 @pytest.mark.parametrize('filename', ('test_module.py', 'module_test.py'))
 def test_is_test_module(filename):
     """Check ``is_test_module`` working for valid filenames."""
@@ -43,3 +59,71 @@ def test_is_test_module(filename):
 def test_not_is_test_module(filename):
     """Check ``is_test_module`` working for invalid filenames."""
     assert not collector.is_test_module(filename)
+
+
+def test_collect_tests_jobs():
+    """Check if ``collect_tests`` collect the same tests using processes."""
+    tests = collector.collect_tests('tests/data')
+    parallel_tests = collector.collect_tests('tests/data', jobs=2)
+    assert list(parallel_tests) == list(tests)
+    for path, module_tests in tests.items():
+        assert [test.junit_id for test in parallel_tests[path]] == [
+            test.junit_id for test in module_tests]
+        assert [test.fields for test in parallel_tests[path]] == [
+            test.fields for test in module_tests]
+
+
+def test_collect_tests_jobs_config(tmp_path, monkeypatch):
+    """Check if ``collect_tests`` sends a config module to the processes."""
+    (tmp_path / 'jobs_config.py').write_text(
+        'DEFAULT_TITLE_VALUE = lambda testcase: testcase.name\n'
+        "MARKERS_IGNORE_LIST = ['run_in_one_thread', 'tier1']\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    config = BetelgeuseConfig('jobs_config')
+    unpickled_config = pickle.loads(pickle.dumps(config))
+    assert unpickled_config.MARKERS_IGNORE_LIST == config.MARKERS_IGNORE_LIST
+    assert unpickled_config.DEFAULT_TITLE_VALUE is config.DEFAULT_TITLE_VALUE
+    tests = collector.collect_tests('tests/data', config=config)
+    parallel_tests = collector.collect_tests(
+        'tests/data', config=config, jobs=2)
+    for path, module_tests in tests.items():
+        assert [test.fields for test in parallel_tests[path]] == [
+            test.fields for test in module_tests]
+
+
+def test_collect_tests_pkginit_changed(tmp_path):
+    """Check if ``collect_tests`` reads the package docstring every run."""
+    package = tmp_path / 'package'
+    package.mkdir()
+    (package / '__init__.py').write_text('"""\n:field1: value1\n"""\n')
+    (package / 'test_module.py').write_text(
+        'def test_something():\n    """Test something."""\n')
+    test_module = str(package / 'test_module.py')
+    tests = collector.collect_tests(str(package))
+    assert tests[test_module][0].fields['field1'] == 'value1'
+    (package / '__init__.py').write_text('"""\n:field1: value2\n"""\n')
+    tests = collector.collect_tests(str(package))
+    assert tests[test_module][0].fields['field1'] == 'value2'
+
+
+def test_test_function(tmp_path):
+    """Check if ``TestFunction`` can be built from a parsed module."""
+    path = tmp_path / 'test_module.py'
+    path.write_text(
+        '"""\n:field1: module\n:field2: module\n"""\n'
+        '@decorator\n'
+        'class TestClass:\n'
+        '    """\n    :field2: class\n    """\n'
+        '    def test_something(self):\n'
+        '        """Test something."""\n'
+    )
+    module_def = ast.parse(path.read_text())
+    module_def.path = str(path)
+    module_def.marker_list = None
+    class_def = module_def.body[1]
+    test = collector.TestFunction(class_def.body[1], class_def, module_def)
+    assert test.fields['field1'] == 'module'
+    assert test.fields['field2'] == 'class'
+    assert test.class_decorators == ['decorator']
+    assert test.pkginit is None
@@ -23,6 +23,62 @@ def test_parse_docstring():
     }
 
 
+def test_parse_docstring_plain_fields():
+    """Check if ``parse_docstring`` parses plain fields without docutils."""
+    docstring = (
+        'Description of the test.\n'
+        '\n'
+        ':field1: value1\n'
+        ':Field 2: value with, some punctuation.\n'
+    )
+    with mock.patch('betelgeuse.parser.parse_rst') as parse_rst:
+        assert parser.parse_docstring(docstring) == {
+            'field1': 'value1',
+            'field 2': 'value with, some punctuation.',
+        }
+    parse_rst.assert_not_called()
+
+
+@pytest.mark.parametrize('docstring', (
+    'Description.\n\n* item 1\n* item 2\n\n:field1: list\n',
+    ':field1: indented\n    continuation\n',
+    ':field1: ``inline`` markup\n',
+    ':field1: reference_\n',
+    ':field1_: reference name\n',
+    'Description.\n:field1: after paragraph\n',
+    ':field1:\n:field2: empty value\n',
+), ids=(
+    'list',
+    'indented-continuation',
+    'inline-markup',
+    'reference-value',
+    'reference-name',
+    'after-paragraph',
+    'empty-value',
+))
+def test_parse_docstring_rst(docstring):
+    """Check if ``parse_docstring`` uses docutils for RST constructs."""
+    with mock.patch('betelgeuse.parser.parse_rst') as parse_rst:
+        parse_rst.return_value = '<main></main>'
+        assert parser.parse_docstring(docstring) == {}
+    parse_rst.assert_called_once_with(docstring)
+
+
+def test_parse_docstring_cache():
+    """Check if ``parse_docstring`` reuses the fields of a known docstring."""
+    docstring = ':field1: value1\n:field2:\n    * item\n'
+    with mock.patch('betelgeuse.parser.parse_rst') as parse_rst:
+        parse_rst.return_value = (
+            '<dl class="field-list"><dt>field1</dt><dd><p>value1</p>\n</dd>'
+            '</dl>'
+        )
+        fields = parser.parse_docstring(docstring)
+        assert fields == {'field1': 'value1'}
+        fields['field1'] = 'changed'
+        assert parser.parse_docstring(docstring) == {'field1': 'value1'}
+    parse_rst.assert_called_once_with(docstring)
+
+
 @pytest.mark.parametrize('docstring', ('', None))
 def test_parse_none_docstring(docstring):
     """Check ``parse_docstring`` returns empty dict on empty input."""
@@ -86,6 +142,16 @@ def test_parse_rst_special_characters():
     )
 
 
+def test_parse_rst_cache():
+    """Check if ``parse_rst`` reuses the result for a known string."""
+    string = 'String to be parsed only once'
+    with mock.patch('betelgeuse.parser.publish_parts') as publish_parts:
+        publish_parts.return_value = {'html_body': '<p>cached</p>'}
+        assert parser.parse_rst(string) == '<p>cached</p>'
+        assert parser.parse_rst(string) == '<p>cached</p>'
+    publish_parts.assert_called_once()
+
+
 def test_parse_markers():
     """
     Test if the markers list is parsed.
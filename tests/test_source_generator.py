@@ -1,5 +1,8 @@
 """Tests for :mod:`betelgeuse.source_generator`."""
+import ast
+
 from betelgeuse import collector
+from betelgeuse import source_generator
 import mock
 
 
@@ -69,3 +72,10 @@ def test_source_singular_module_marker():
         if test.name == 'test_sing'
     ].pop()
     assert marked_test.fields['markers'] == 'tier2'
+
+
+def test_gen_source_constant_tuple():
+    """Check if ``gen_source`` generates tuple and ellipsis constants."""
+    node = ast.parse('decorator_with_args((1, 2), (1,), ...)').body[0].value
+    assert source_generator.gen_source(node) == (
+        'decorator_with_args((1, 2), (1,), ...)')